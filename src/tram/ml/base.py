@@ -14,6 +14,7 @@ import pdfplumber
 from bs4 import BeautifulSoup
 from constance import config
 from django.conf import settings
+from django.core.cache import cache
 from django.db import transaction
 from sklearn.dummy import DummyClassifier
 from sklearn.feature_extraction.text import CountVectorizer
@@ -29,6 +30,8 @@ from tram import models as db_models
 
 logger = logging.getLogger(__name__)
 
+MODEL_METADATA_CACHE_TIMEOUT = 60 * 60
+
 
 class Sentence(object):
     def __init__(self, text, order, mappings):
@@ -413,7 +416,8 @@ class ModelManager(object):
                 return
             time.sleep(1)
 
-    def get_model_filepath(self, model_class):
+    @staticmethod
+    def get_model_filepath(model_class):
         filepath = settings.ML_MODEL_DIR + "/" + model_class.__name__ + ".pkl"
         return filepath
 
@@ -443,8 +447,29 @@ class ModelManager(object):
     @staticmethod
     def get_model_metadata(model_key):
         """
-        Returns a dict of model metadata for a particular ML model, identified by it's key
+        Returns a dict of model metadata for a particular ML model, identified by it's key.
+        Loading a model is expensive, so the metadata is cached until the model's file
+        changes, i.e. until the model is retrained.
         """
+        model_class = ModelManager.model_registry.get(model_key)
+        if not model_class:
+            raise ValueError("Unrecognized model: %s" % model_key)
+
+        model_filepath = ModelManager.get_model_filepath(model_class)
+        if path.exists(model_filepath):
+            version = path.getmtime(model_filepath)
+        else:
+            version = 0
+        key = "model-metadata-%s-%f" % (model_key, version)
+
+        return cache.get_or_set(
+            key,
+            lambda: ModelManager._load_model_metadata(model_key),
+            MODEL_METADATA_CACHE_TIMEOUT,
+        )
+
+    @staticmethod
+    def _load_model_metadata(model_key):
         mm = ModelManager(model_key)
         model_name = mm.model.__class__.__name__
         if mm.model.last_trained is None:
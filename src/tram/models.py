@@ -120,6 +120,21 @@ class Report(models.Model):
     created_on = models.DateTimeField(auto_now_add=True)
     updated_on = models.DateTimeField(auto_now=True)
 
+    @classmethod
+    def get_sentence_counts(cls):
+        """
+        return: The Reports, annotated with how many of their sentences have been
+                accepted, are pending review, and there are in total.
+        """
+        sentence_counts = cls.objects.annotate(
+            accepted_sentences=Count(
+                "sentence", filter=Q(sentence__disposition="accept")
+            ),
+            reviewing_sentences=Count("sentence", filter=Q(sentence__disposition=None)),
+            total_sentences=Count("sentence"),
+        )
+        return sentence_counts
+
     def __str__(self):
         return self.name
 
@@ -0,0 +1,21 @@
+import orjson
+from rest_framework import renderers
+from rest_framework.utils.encoders import JSONEncoder
+
+_encoder = JSONEncoder()
+
+
+class ORJSONRenderer(renderers.BaseRenderer):
+    """Drop-in replacement for DRF's JSONRenderer backed by orjson. Types that orjson
+    doesn't support natively (Decimal, lazy translation strings, etc.) fall back to DRF's
+    JSONEncoder.
+    """
+
+    media_type = "application/json"
+    format = "json"
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return orjson.dumps(data, default=_encoder.default)
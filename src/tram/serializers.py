@@ -1,16 +1,37 @@
-from django.db import transaction
+import copy
+
+from django.db import connection, transaction
 from rest_framework import serializers
 
 from tram import models as db_models
 
+BULK_CREATE_BATCH_SIZE = 1000
+
+
+class CachedFieldsModelSerializer(serializers.ModelSerializer):
+    """ModelSerializer.get_fields() introspects the model on every instantiation. The
+    fields of the serializers below never vary between instances, so they are built once
+    per class and shallow-copied for each instance.
+
+    Shallow copies share any child fields, so don't use this for serializers that declare
+    nested serializers or many=True relations.
+    """
+
+    def get_fields(self):
+        cls = type(self)
+        # Look in the class's own __dict__ so that subclasses don't share a cache
+        if "_fields_cache" not in cls.__dict__:
+            cls._fields_cache = super().get_fields()
+        return {name: copy.copy(field) for name, field in cls._fields_cache.items()}
+
 
-class AttackObjectSerializer(serializers.ModelSerializer):
+class AttackObjectSerializer(CachedFieldsModelSerializer):
     class Meta:
         model = db_models.AttackObject
         fields = ["id", "attack_id", "name"]
 
 
-class DocumentProcessingJobSerializer(serializers.ModelSerializer):
+class DocumentProcessingJobSerializer(CachedFieldsModelSerializer):
     """Needs to be kept in sync with ReportSerializer for display purposes"""
 
     name = serializers.SerializerMethodField()
@@ -51,7 +72,7 @@ class DocumentProcessingJobSerializer(serializers.ModelSerializer):
             return "Unknown"
 
 
-class MappingSerializer(serializers.ModelSerializer):
+class MappingSerializer(CachedFieldsModelSerializer):
     attack_id = serializers.SerializerMethodField()
     name = serializers.SerializerMethodField()
     confidence = serializers.DecimalField(max_digits=100, decimal_places=1)
@@ -101,7 +122,7 @@ class MappingSerializer(serializers.ModelSerializer):
         return mapping
 
 
-class ReportSerializer(serializers.ModelSerializer):
+class ReportSerializer(CachedFieldsModelSerializer):
     byline = serializers.SerializerMethodField()
     accepted_sentences = serializers.SerializerMethodField()
     reviewing_sentences = serializers.SerializerMethodField()
@@ -156,6 +177,32 @@ class ReportSerializer(serializers.ModelSerializer):
         return status
 
 
+class ReportSummarySerializer(ReportSerializer):
+    """A read-only subset of ReportSerializer for listing reports. Sentence counts are
+    read from the annotations added by Report.get_sentence_counts() instead of being
+    queried per report.
+    """
+
+    accepted_sentences = serializers.IntegerField(read_only=True)
+    reviewing_sentences = serializers.IntegerField(read_only=True)
+    total_sentences = serializers.IntegerField(read_only=True)
+
+    class Meta(ReportSerializer.Meta):
+        fields = [
+            "id",
+            "document_id",
+            "name",
+            "byline",
+            "accepted_sentences",
+            "reviewing_sentences",
+            "total_sentences",
+            "status",
+        ]
+
+    def get_reviewing_sentences(self, obj):
+        return obj.reviewing_sentences
+
+
 class ReportExportSerializer(ReportSerializer):
     """Defines the export format for reports. Defined separately from ReportSerializer so that:
     1. ReportSerializer and ReportExportSerializer can evolve independently
@@ -170,7 +217,8 @@ class ReportExportSerializer(ReportSerializer):
         ]
 
     def get_sentences(self, obj):
-        sentences = db_models.Sentence.objects.filter(report=obj)
+        # Uses the related manager so that a prefetched queryset is honored
+        sentences = obj.sentence_set.all()
         sentences_serializer = SentenceSerializer(sentences, many=True)
         return sentences_serializer.data
 
@@ -201,21 +249,85 @@ class ReportExportSerializer(ReportSerializer):
                 created_by=validated_data.get("created_by"),
             )
 
-            for sentence in validated_data["sentences"]:
-                if sentence.is_valid():
-                    sentence.validated_data["report"] = report
-                    sentence.save()
-                else:
-                    # TODO: Handle this case better
-                    raise Exception("Sentence validation needs to be handled better")
+            sentence_serializers = validated_data["sentences"]
+            sentences = self._create_sentences(report, sentence_serializers)
+            self._create_mappings(report, sentences, sentence_serializers)
 
         return report
 
+    def _create_sentences(self, report, sentence_serializers):
+        """Inserts the report's sentences in batches, mirroring SentenceSerializer.create()"""
+        sentences = []
+        for sentence in sentence_serializers:
+            if not sentence.is_valid():
+                # TODO: Handle this case better
+                raise Exception("Sentence validation needs to be handled better")
+
+            sentences.append(
+                db_models.Sentence(
+                    text=sentence.validated_data["text"],
+                    document=None,
+                    report=report,
+                    disposition=sentence.validated_data["disposition"],
+                )
+            )
+
+        sentences = db_models.Sentence.objects.bulk_create(
+            sentences, batch_size=BULK_CREATE_BATCH_SIZE
+        )
+        if not connection.features.can_return_rows_from_bulk_insert:
+            # Primary keys aren't set by bulk_create() on this backend (e.g. SQLite).
+            # The report was just created, so its sentences are exactly those inserted.
+            sentences = list(
+                db_models.Sentence.objects.filter(report=report).order_by("id")
+            )
+        return sentences
+
+    def _create_mappings(self, report, sentences, sentence_serializers):
+        """Inserts the mappings of every sentence in batches, mirroring MappingSerializer.create()"""
+        pending = [
+            (sentence, mapping)
+            for sentence, sentence_serializer in zip(sentences, sentence_serializers)
+            for mapping in sentence_serializer.validated_data.get("mappings", [])
+        ]
+        attack_objects = db_models.AttackObject.objects.in_bulk(
+            {mapping.initial_data["attack_id"] for _, mapping in pending},
+            field_name="attack_id",
+        )
+
+        mappings = []
+        for sentence, mapping in pending:
+            attack_id = mapping.initial_data["attack_id"]
+            if attack_id not in attack_objects:
+                raise db_models.AttackObject.DoesNotExist(
+                    "Unknown ATT&CK ID: %s" % attack_id
+                )
+            try:
+                confidence = mapping.fields["confidence"].run_validation(
+                    mapping.initial_data.get("confidence", serializers.empty)
+                )
+            except serializers.ValidationError:
+                # TODO: Handle this case better
+                raise Exception("Mapping validation needs to be handled better")
+
+            mappings.append(
+                db_models.Mapping(
+                    report=report,
+                    sentence=sentence,
+                    attack_object=attack_objects[attack_id],
+                    confidence=confidence,
+                )
+            )
+
+        db_models.Mapping.objects.bulk_create(
+            mappings, batch_size=BULK_CREATE_BATCH_SIZE
+        )
+
     def update(self, instance, validated_data):
         raise NotImplementedError()
 
 
-class SentenceSerializer(serializers.ModelSerializer):
+class SentenceSerializer(CachedFieldsModelSerializer):
     mappings = serializers.SerializerMethodField()
 
     class Meta:
@@ -223,7 +335,8 @@ class SentenceSerializer(serializers.ModelSerializer):
         fields = ["id", "text", "order", "disposition", "mappings"]
 
     def get_mappings(self, obj):
-        mappings = db_models.Mapping.objects.filter(sentence=obj)
+        # Uses the related manager so that a prefetched queryset is honored
+        mappings = obj.mapping_set.all()
         mappings_serializer = MappingSerializer(mappings, many=True)
         return mappings_serializer.data
 
@@ -1,21 +1,30 @@
+import functools
+import hashlib
 import io
-import json
 import logging
 from urllib.parse import quote
 
+import orjson
 from constance import config
 from django.contrib.auth.decorators import login_required
+from django.core.cache import cache
+from django.db.models import Count, Exists, Max, OuterRef, Prefetch
 from django.http import (
+    FileResponse,
     Http404,
     HttpResponse,
     HttpResponseBadRequest,
-    JsonResponse,
     StreamingHttpResponse,
 )
-from django.shortcuts import render
-from rest_framework import viewsets
+from django.shortcuts import get_object_or_404, render
+from django.utils.decorators import method_decorator
+from django.views.decorators.gzip import gzip_page
+from django.views.decorators.http import condition
+from rest_framework import renderers, viewsets
+from rest_framework.response import Response
 
 import tram.report.docx
+import tram.report.export
 from tram import serializers
 from tram.ml import base
 from tram.models import (
@@ -26,9 +35,55 @@ from tram.models import (
     Report,
     Sentence,
 )
+from tram.renderers import ORJSONRenderer
 
 logger = logging.getLogger(__name__)
 
+# Report and document names repeat across downloads, so memoize percent-encoding them
+_quote = functools.lru_cache(maxsize=1024)(quote)
+
+STREAMING_CHUNK_SIZE = 64 * 1024
+VIEW_CACHE_TIMEOUT = 60 * 60
+
+_ORJSON_RENDERER = ORJSONRenderer()
+
+
+def _cache_version(*querysets):
+    """
+    Fingerprint the given querysets so that cache keys change whenever a row is
+    added, removed or saved. Every queryset must be over a model with an updated_on
+    field.
+    """
+    parts = []
+    for queryset in querysets:
+        stats = queryset.aggregate(count=Count("id"), updated=Max("updated_on"))
+        updated = stats["updated"].timestamp() if stats["updated"] else 0
+        parts.append("%d.%f" % (stats["count"], updated))
+    return "-".join(parts)
+
+
+def _report_export_etag(request, *args, **kwargs):
+    """
+    ETag for a report export. Editing a sentence or adding/removing a mapping doesn't
+    touch the report row, so they are fingerprinted as well. The query string and
+    Accept header select the export format, so they are part of the tag too.
+    """
+    # The report is looked up through the viewset, so reports that retrieve would
+    # not return (e.g. excluded by ?doc-id=) get no ETag either
+    view = request.parser_context["view"]
+    try:
+        report_id = view.get_object().pk
+    except Http404:
+        return None
+
+    version = _cache_version(
+        Report.objects.filter(id=report_id),
+        Sentence.objects.filter(report_id=report_id),
+        Mapping.objects.filter(report_id=report_id),
+    )
+    variant = "%s|%s" % (request.GET.urlencode(), request.META.get("HTTP_ACCEPT", ""))
+    return hashlib.sha256(("%s|%s" % (version, variant)).encode()).hexdigest()
+
 
 class AttackObjectViewSet(viewsets.ModelViewSet):
     queryset = AttackObject.objects.all()
@@ -41,11 +96,11 @@ class DocumentProcessingJobViewSet(viewsets.ModelViewSet):
 
 
 class MappingViewSet(viewsets.ModelViewSet):
-    queryset = Mapping.objects.all()
+    queryset = Mapping.objects.select_related("attack_object")
     serializer_class = serializers.MappingSerializer
 
     def get_queryset(self):
-        queryset = MappingViewSet.queryset
+        queryset = super().get_queryset()
         sentence_id = self.request.query_params.get("sentence-id", None)
         if sentence_id:
             queryset = queryset.filter(sentence__id=sentence_id)
@@ -59,17 +114,48 @@ class ReportViewSet(viewsets.ModelViewSet):
 
 
 class ReportExportViewSet(viewsets.ModelViewSet):
-    queryset = Report.objects.all()
+    # Only used by list; retrieve builds its export from values() rows instead
+    queryset = Report.objects.prefetch_related(
+        Prefetch(
+            "sentence_set",
+            queryset=Sentence.objects.prefetch_related(
+                Prefetch(
+                    "mapping_set",
+                    queryset=Mapping.objects.select_related("attack_object"),
+                )
+            ),
+        )
+    )
     serializer_class = serializers.ReportExportSerializer
+    renderer_classes = [ORJSONRenderer, renderers.BrowsableAPIRenderer]
+
+    def get_renderers(self):
+        # ORJSONRenderer is stateless, so one instance is shared across requests.
+        # BrowsableAPIRenderer keeps per-request state on itself, so it is not.
+        return [
+            _ORJSON_RENDERER if renderer is ORJSONRenderer else renderer()
+            for renderer in self.renderer_classes
+        ]
 
     def get_queryset(self):
-        queryset = ReportViewSet.queryset
+        queryset = super().get_queryset()
         document_id = self.request.query_params.get("doc-id", None)
         if document_id:
             queryset = queryset.filter(document__id=document_id)
 
+        # retrieve only needs the id from get_object(), see tram.report.export
+        if self.action == "retrieve":
+            queryset = queryset.prefetch_related(None).only("id")
+
         return queryset
 
+    @method_decorator(gzip_page)
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    # DOCX responses already set Content-Encoding, so gzip_page passes them through
+    @method_decorator(gzip_page)
+    @method_decorator(condition(etag_func=_report_export_etag))
     def retrieve(self, request, *args, **kwargs):
 
         report_format = request.GET.get("type", "")
@@ -80,8 +166,13 @@ class ReportExportViewSet(viewsets.ModelViewSet):
             logger.warning("Invalid File Type. Defaulting to JSON.")
 
         # Retrieve report data as json
-        response = super().retrieve(request, *args, **kwargs)
-        basename = quote(self.get_object().name, safe="")
+        report_id = self.get_object().pk
+        try:
+            data = tram.report.export.build(report_id)
+        except Report.DoesNotExist:
+            raise Http404("Report does not exist")
+        response = Response(data)
+        basename = _quote(data["name"], safe="")
 
         if report_format == "json":
             response["Content-Disposition"] = f'attachment; filename="{basename}.json"'
@@ -89,7 +180,7 @@ class ReportExportViewSet(viewsets.ModelViewSet):
 
         elif report_format == "docx":
             # Uses json dictionary to create formatted document
-            document = tram.report.docx.build(response.data)
+            document = tram.report.docx.build(data)
 
             # save document info
             buffer = io.BytesIO()
@@ -101,8 +192,11 @@ class ReportExportViewSet(viewsets.ModelViewSet):
                 "application/"
                 "vnd.openxmlformats-officedocument.wordprocessingml.document"
             )
+            # Iterating a BytesIO yields newline-delimited "lines", which for
+            # binary zip data means arbitrarily sized chunks; read fixed-size
+            # chunks instead.
             response = StreamingHttpResponse(
-                streaming_content=buffer,  # use the stream's content
+                streaming_content=iter(lambda: buffer.read(STREAMING_CHUNK_SIZE), b""),
                 content_type=content_type,
             )
 
@@ -112,31 +206,63 @@ class ReportExportViewSet(viewsets.ModelViewSet):
 
 
 class SentenceViewSet(viewsets.ModelViewSet):
-    queryset = Sentence.objects.all()
+    queryset = Sentence.objects.prefetch_related(
+        Prefetch(
+            "mapping_set", queryset=Mapping.objects.select_related("attack_object")
+        )
+    )
     serializer_class = serializers.SentenceSerializer
 
     def get_queryset(self):
-        queryset = SentenceViewSet.queryset
+        queryset = super().get_queryset()
         report_id = self.request.query_params.get("report-id", None)
         if report_id:
             queryset = queryset.filter(report__id=report_id)
 
         attack_id = self.request.query_params.get("attack-id", None)
         if attack_id:
-            sentences = Mapping.objects.filter(
-                attack_object__attack_id=attack_id
-            ).values("sentence")
-            queryset = queryset.filter(id__in=sentences)
+            mappings = Mapping.objects.filter(
+                sentence=OuterRef("pk"), attack_object__attack_id=attack_id
+            )
+            queryset = queryset.filter(Exists(mappings))
         return queryset
 
 
+def _get_attack_techniques():
+    """Serialized ATT&CK techniques, as shown in the technique pickers"""
+    key = "attack-techniques-%s" % _cache_version(AttackObject.objects.all())
+
+    def serialize():
+        techniques = AttackObject.objects.all().order_by("attack_id")
+        return list(serializers.AttackObjectSerializer(techniques, many=True).data)
+
+    return cache.get_or_set(key, serialize, VIEW_CACHE_TIMEOUT)
+
+
+def _get_sentence_counts():
+    """AttackObject.get_sentence_counts() as plain dicts of the fields ml_home renders"""
+    sentence_counts = AttackObject.get_sentence_counts().values(
+        "attack_id",
+        "attack_url",
+        "name",
+        "accepted_sentences",
+        "pending_sentences",
+        "total_sentences",
+    )
+    return list(sentence_counts)
+
+
 @login_required
 def index(request):
-    jobs = DocumentProcessingJob.objects.all()
+    jobs = DocumentProcessingJob.objects.select_related("document", "created_by")
     job_serializer = serializers.DocumentProcessingJobSerializer(jobs, many=True)
 
-    reports = Report.objects.all()
-    report_serializer = serializers.ReportSerializer(reports, many=True)
+    reports = (
+        Report.get_sentence_counts()
+        .select_related("created_by")
+        .only("id", "document_id", "name", "created_by", "created_on")
+    )
+    report_serializer = serializers.ReportSummarySerializer(reports, many=True)
 
     context = {
         "job_queue": job_serializer.data,
@@ -169,7 +295,10 @@ def upload(request):
             request.FILES["file"], request.user
         )
     elif file_content_type in ("application/json",):  # .json files
-        json_data = json.loads(request.FILES["file"].read())
+        try:
+            json_data = orjson.loads(request.FILES["file"].read())
+        except ValueError:  # Covers JSONDecodeError and UnicodeDecodeError
+            return HttpResponseBadRequest("Invalid JSON file")
         res = serializers.ReportExportSerializer(data=json_data)
 
         if res.is_valid():
@@ -183,12 +312,12 @@ def upload(request):
         response["job-id"] = dpj.pk
         response["doc-id"] = dpj.document.pk
 
-    return JsonResponse(response)
+    return HttpResponse(orjson.dumps(response), content_type="application/json")
 
 
 @login_required
 def ml_home(request):
-    techniques = AttackObject.get_sentence_counts()
+    techniques = _get_sentence_counts()
     model_metadata = base.ModelManager.get_all_model_metadata()
 
     context = {
@@ -203,10 +332,7 @@ def ml_home(request):
 
 @login_required
 def ml_technique_sentences(request, attack_id):
-    techniques = AttackObject.objects.all().order_by("attack_id")
-    techniques_serializer = serializers.AttackObjectSerializer(techniques, many=True)
-
-    context = {"attack_id": attack_id, "attack_techniques": techniques_serializer.data}
+    context = {"attack_id": attack_id, "attack_techniques": _get_attack_techniques()}
     return render(request, "technique_sentences.html", context)
 
 
@@ -222,14 +348,11 @@ def ml_model_detail(request, model_key):
 
 @login_required
 def analyze(request, pk):
-    report = Report.objects.get(id=pk)
-    techniques = AttackObject.objects.all().order_by("attack_id")
-    techniques_serializer = serializers.AttackObjectSerializer(techniques, many=True)
-
+    report = get_object_or_404(Report.objects.only("id", "name"), id=pk)
     context = {
         "report_id": report.id,
         "report_name": report.name,
-        "attack_techniques": techniques_serializer.data,
+        "attack_techniques": _get_attack_techniques(),
     }
     return render(request, "analyze.html", context)
 
@@ -237,17 +360,16 @@ def analyze(request, pk):
 @login_required
 def download_document(request, doc_id):
     """Download a verbatim copy of a previously uploaded document."""
-    doc = Document.objects.get(id=doc_id)
+    doc = get_object_or_404(Document.objects.only("docfile"), id=doc_id)
     docfile = doc.docfile
 
     try:
-        with docfile.open("rb") as report_file:
-            response = HttpResponse(
-                report_file, content_type="application/octet-stream"
-            )
-            filename = quote(docfile.name)
-            response["Content-Disposition"] = f"attachment; filename={filename}"
+        report_file = docfile.open("rb")
     except IOError:
         raise Http404("File does not exist")
 
+    # FileResponse streams the file and closes it once the response is consumed
+    response = FileResponse(report_file, content_type="application/octet-stream")
+    filename = _quote(docfile.name)
+    response["Content-Disposition"] = f"attachment; filename={filename}"
     return response
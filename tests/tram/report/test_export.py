@@ -0,0 +1,44 @@
+import pytest
+
+import tram.report.export
+from tram import models, serializers
+
+
+@pytest.mark.django_db
+def test_export_build_matches_report_export_serializer(report):
+    # Arrange
+    expected = serializers.ReportExportSerializer(report).data
+
+    # Act
+    data = tram.report.export.build(report.id)
+
+    # Assert
+    assert data == expected
+
+
+@pytest.mark.django_db
+def test_export_build_matches_report_export_serializer_with_document(
+    report_with_document,
+):
+    # Arrange
+    expected = serializers.ReportExportSerializer(report_with_document).data
+
+    # Act
+    data = tram.report.export.build(report_with_document.id)
+
+    # Assert
+    assert data == expected
+
+
+@pytest.mark.django_db
+def test_export_build_query_count_is_constant(report, django_assert_num_queries):
+    # Act
+    with django_assert_num_queries(3):
+        tram.report.export.build(report.id)
+
+
+@pytest.mark.django_db
+def test_export_build_raises_for_missing_report():
+    # Act / Assert
+    with pytest.raises(models.Report.DoesNotExist):
+        tram.report.export.build(999999)
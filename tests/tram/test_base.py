@@ -1,3 +1,5 @@
+import os
+
 import pytest
 from constance import config
 from django.contrib.auth.models import User
@@ -195,6 +197,13 @@ class TestSkLearnModel:
             NonSKLearnPipeline()
 
 
+class TestModelManager:
+    def test_get_model_metadata_raises_value_error_on_unknown_model(self):
+        # Act / Assert
+        with pytest.raises(ValueError):
+            base.ModelManager.get_model_metadata("this-should-raise")
+
+
 @pytest.mark.django_db
 class TestsThatNeedTrainingData:
     """
@@ -223,6 +232,37 @@ class TestsThatNeedTrainingData:
         # Assert
         # TODO: Something meaningful
 
+    def test_get_model_metadata_is_cached(self, mocker):
+        # Arrange
+        expected = base.ModelManager.get_model_metadata("dummy")
+        load = mocker.spy(base.ModelManager, "_load_model_metadata")
+
+        # Act
+        metadata = base.ModelManager.get_model_metadata("dummy")
+
+        # Assert
+        assert metadata == expected
+        assert load.call_count == 0
+
+    def test_get_model_metadata_is_refreshed_when_model_file_changes(
+        self, mocker, settings, tmp_path
+    ):
+        # Arrange
+        settings.ML_MODEL_DIR = str(tmp_path)
+        base.ModelManager.get_model_metadata("dummy")
+        model_file = tmp_path / "DummyModel.pkl"
+        model_file.write_bytes(b"")
+        os.utime(model_file, (1234567890, 1234567890))
+        load = mocker.patch.object(
+            base.ModelManager, "_load_model_metadata", return_value={}
+        )
+
+        # Act
+        base.ModelManager.get_model_metadata("dummy")
+
+        # Assert
+        load.assert_called_once_with("dummy")
+
     """
     ----- End ModelManager Tests -----
     """
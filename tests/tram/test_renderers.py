@@ -0,0 +1,32 @@
+import json
+from decimal import Decimal
+
+from rest_framework.renderers import JSONRenderer
+
+from tram.renderers import ORJSONRenderer
+
+
+class TestORJSONRenderer:
+    def test_output_matches_json_renderer(self):
+        # Arrange
+        data = {"name": "Report", "sentences": [{"text": "Ünïcode", "order": 1}]}
+
+        # Act
+        rendered = ORJSONRenderer().render(data)
+
+        # Assert
+        assert json.loads(rendered) == json.loads(JSONRenderer().render(data))
+
+    def test_unsupported_types_fall_back_to_drf_encoder(self):
+        # Act
+        rendered = ORJSONRenderer().render({"confidence": Decimal("99.5")})
+
+        # Assert
+        assert json.loads(rendered) == {"confidence": 99.5}
+
+    def test_none_renders_empty_body(self):
+        # Act
+        rendered = ORJSONRenderer().render(None)
+
+        # Assert
+        assert rendered == b""
@@ -0,0 +1,91 @@
+import json
+
+import pytest
+
+from tram import models as db_models
+from tram import serializers
+
+
+@pytest.mark.django_db
+class TestCachedFieldsModelSerializer:
+    def test_fields_are_built_once_per_class(self, mocker, mapping):
+        # Arrange
+        serializers.MappingSerializer(mapping).fields
+        build_field = mocker.spy(serializers.MappingSerializer, "build_field")
+
+        # Act
+        data = serializers.MappingSerializer(mapping).data
+
+        # Assert
+        assert build_field.call_count == 0
+        assert data["attack_id"] == "T1059"
+
+    def test_instances_do_not_share_bound_fields(self, mapping):
+        # Act
+        first = serializers.MappingSerializer(mapping)
+        second = serializers.MappingSerializer(mapping)
+
+        # Assert
+        assert first.fields["confidence"] is not second.fields["confidence"]
+        assert first.fields["confidence"].parent is first
+        assert second.fields["confidence"].parent is second
+
+    def test_subclasses_do_not_share_cache(self, report):
+        # Act
+        summary_fields = serializers.ReportSummarySerializer().fields
+        report_fields = serializers.ReportSerializer().fields
+
+        # Assert
+        assert "text" not in summary_fields
+        assert "text" in report_fields
+
+
+@pytest.mark.django_db
+class TestReportExportSerializer:
+    def test_create_saves_sentences_and_mappings(self):
+        # Arrange
+        with open("tests/data/report-for-simple-testdocx.json") as f:
+            data = json.load(f)
+        serializer = serializers.ReportExportSerializer(data=data)
+        serializer.is_valid(raise_exception=True)
+
+        # Act
+        report = serializer.save()
+
+        # Assert
+        sentences = db_models.Sentence.objects.filter(report=report).order_by("id")
+        assert [s.text for s in sentences] == [s["text"] for s in data["sentences"]]
+        for sentence, expected in zip(sentences, data["sentences"]):
+            mappings = db_models.Mapping.objects.filter(sentence=sentence)
+            assert sorted(
+                (m.attack_object.attack_id, m.confidence) for m in mappings
+            ) == sorted(
+                (m["attack_id"], float(m["confidence"])) for m in expected["mappings"]
+            )
+
+    def test_create_query_count_does_not_grow_with_sentences(
+        self, django_assert_max_num_queries
+    ):
+        # Arrange
+        with open("tests/data/test-training-data.json") as f:
+            data = json.load(f)
+        serializer = serializers.ReportExportSerializer(data=data)
+        serializer.is_valid(raise_exception=True)
+
+        # Act
+        # 163 sentences, each with one mapping
+        with django_assert_max_num_queries(15):
+            serializer.save()
+
+    def test_create_rejects_unknown_attack_id(self):
+        # Arrange
+        with open("tests/data/report-for-simple-testdocx.json") as f:
+            data = json.load(f)
+        data["sentences"][0]["mappings"][0]["attack_id"] = "T0000"
+        serializer = serializers.ReportExportSerializer(data=data)
+        serializer.is_valid(raise_exception=True)
+
+        # Act/Assert
+        with pytest.raises(db_models.AttackObject.DoesNotExist):
+            serializer.save()
+        assert not db_models.Report.objects.filter(name=data["name"]).exists()
@@ -1,3 +1,4 @@
+import gzip
 import json
 
 import pytest
@@ -5,7 +6,8 @@ from django.contrib.auth.models import User
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import Client
 
-from tram.models import Document, DocumentProcessingJob
+from tram import views
+from tram.models import Document, DocumentProcessingJob, Mapping
 
 
 @pytest.fixture
@@ -105,6 +107,29 @@ class TestIndex:
         assert response.status_code == 200
         assert b"<title>TRAM - Threat Report ATT&CK Mapper</title>" in response.content
 
+    def test_index_report_counts_match_report_api(self, logged_in_client, report):
+        # Arrange
+        expected = logged_in_client.get(f"/api/reports/{report.id}/").json()
+
+        # Act
+        response = logged_in_client.get("/")
+        listed = next(r for r in response.context["reports"] if r["id"] == report.id)
+
+        # Assert
+        for field in ("accepted_sentences", "reviewing_sentences", "total_sentences"):
+            assert listed[field] == expected[field]
+        assert listed["status"] == expected["status"]
+
+    def test_index_query_count_is_constant(
+        self, logged_in_client, report, django_assert_max_num_queries
+    ):
+        # Act
+        with django_assert_max_num_queries(5):
+            response = logged_in_client.get("/")
+
+        # Assert
+        assert response.status_code == 200
+
     def test_index_loads_with_one_job_queued(
         self, logged_in_client, document_processing_job
     ):
@@ -126,6 +151,13 @@ class TestAnalyze:
         assert response.status_code == 200
         assert b"<title>TRAM - Analyze Report</title>" in response.content
 
+    def test_analyze_returns_404_for_missing_report(self, logged_in_client):
+        # Act
+        response = logged_in_client.get("/analyze/999999/")
+
+        # Assert
+        assert response.status_code == 404
+
 
 @pytest.mark.django_db
 class TestUpload:
@@ -153,7 +185,8 @@ class TestUpload:
 
         # Assert
         assert response.status_code == 200
-        assert b"File saved for processing" in response.content
+        assert response["Content-Type"] == "application/json"
+        assert response.json()["message"] == "File saved for processing."
         assert doc_count_pre + 1 == doc_count_post
         assert job_count_pre + 1 == job_count_post
 
@@ -179,6 +212,20 @@ class TestUpload:
         assert response.status_code == 400
         assert response.content == b"Unsupported file type"
 
+    def test_upload_malformed_json_causes_bad_request(self, logged_in_client):
+        # Arrange
+        f = SimpleUploadedFile(
+            "test-report.json", b"{not valid json", content_type="application/json"
+        )
+        data = {"file": f}
+
+        # Act
+        response = logged_in_client.post("/upload/", data)
+
+        # Assert
+        assert response.status_code == 400
+        assert response.content == b"Invalid JSON file"
+
 
 @pytest.mark.django_db
 class TestMappingViewSet:
@@ -210,6 +257,16 @@ class TestMappingViewSet:
         assert len(json_response) == 1
         assert json_response[0]["attack_id"] == "T1059"
 
+    def test_get_mappings_query_count_is_constant(
+        self, logged_in_client, django_assert_max_num_queries
+    ):
+        # Act
+        with django_assert_max_num_queries(5):
+            response = logged_in_client.get("/api/mappings/")
+
+        # Assert
+        assert response.status_code == 200
+
 
 @pytest.mark.django_db
 class TestSentenceViewSet:
@@ -252,6 +309,36 @@ class TestSentenceViewSet:
         assert len(json_response) == 10
         assert json_response[0]["order"] == 1000
 
+    def test_get_sentences_by_technique_lists_each_sentence_once(
+        self, logged_in_client, mapping
+    ):
+        # Arrange
+        duplicate = Mapping.objects.create(
+            report=mapping.report,
+            sentence=mapping.sentence,
+            attack_object=mapping.attack_object,
+            confidence=50.0,
+        )
+
+        # Act
+        response = logged_in_client.get("/api/sentences/?attack-id=T1059")
+        json_response = json.loads(response.content)
+        duplicate.delete()
+
+        # Assert
+        ids = [sentence["id"] for sentence in json_response]
+        assert ids.count(mapping.sentence.id) == 1
+
+    def test_get_sentences_query_count_is_constant(
+        self, logged_in_client, django_assert_max_num_queries
+    ):
+        # Act
+        with django_assert_max_num_queries(5):
+            response = logged_in_client.get("/api/sentences/")
+
+        # Assert
+        assert response.status_code == 200
+
 
 @pytest.mark.django_db
 class TestReportExport:
@@ -264,6 +351,144 @@ class TestReportExport:
         assert "sentences" in json_response
         assert len(json_response["sentences"][0]["mappings"]) == 1
 
+    def test_get_report_export_query_count_is_constant(
+        self, logged_in_client, django_assert_max_num_queries
+    ):
+        # Act
+        # Report 1 has 163 sentences; a per-sentence lookup would blow past this.
+        with django_assert_max_num_queries(15):
+            response = logged_in_client.get("/api/report-export/1/")
+
+        # Assert
+        assert response.status_code == 200
+
+    def test_report_export_is_gzipped_when_accepted(self, logged_in_client, report):
+        # Act
+        response = logged_in_client.get(
+            "/api/report-export/1/", HTTP_ACCEPT_ENCODING="gzip"
+        )
+
+        # Assert
+        assert response["Content-Encoding"] == "gzip"
+        assert "Accept-Encoding" in response["Vary"]
+        assert "sentences" in json.loads(gzip.decompress(response.content))
+
+    def test_report_export_list_is_gzipped_when_accepted(
+        self, logged_in_client, report
+    ):
+        # Act
+        response = logged_in_client.get(
+            "/api/report-export/", HTTP_ACCEPT_ENCODING="gzip"
+        )
+
+        # Assert
+        assert response["Content-Encoding"] == "gzip"
+        assert len(json.loads(gzip.decompress(response.content))) >= 1
+
+    def test_gzipped_report_export_honors_etag(self, logged_in_client, report):
+        # Arrange
+        etag = logged_in_client.get(
+            "/api/report-export/1/", HTTP_ACCEPT_ENCODING="gzip"
+        )["ETag"]
+
+        # Act
+        response = logged_in_client.get(
+            "/api/report-export/1/",
+            HTTP_ACCEPT_ENCODING="gzip",
+            HTTP_IF_NONE_MATCH=etag,
+        )
+
+        # Assert
+        assert response.status_code == 304
+
+    def test_get_missing_report_export_returns_404(self, logged_in_client):
+        # Act
+        response = logged_in_client.get("/api/report-export/999999/")
+
+        # Assert
+        assert response.status_code == 404
+
+    def test_get_report_export_with_non_numeric_id_returns_404(self, logged_in_client):
+        # Act
+        response = logged_in_client.get("/api/report-export/abc/")
+
+        # Assert
+        assert response.status_code == 404
+
+    def test_get_report_export_for_other_document_returns_404(
+        self, logged_in_client, report_with_document
+    ):
+        # Arrange
+        other_doc_id = report_with_document.document.id + 1
+
+        # Act
+        response = logged_in_client.get(
+            f"/api/report-export/{report_with_document.id}/?doc-id={other_doc_id}"
+        )
+
+        # Assert
+        assert response.status_code == 404
+
+    def test_report_export_reuses_json_renderer(self, logged_in_client, report):
+        # Act
+        first = logged_in_client.get("/api/report-export/1/")
+        second = logged_in_client.get("/api/report-export/1/")
+
+        # Assert
+        assert first.accepted_renderer is views._ORJSON_RENDERER
+        assert second.accepted_renderer is views._ORJSON_RENDERER
+
+    def test_report_export_filename_is_percent_encoded(self, logged_in_client, report):
+        # Act
+        response = logged_in_client.get("/api/report-export/1/")
+
+        # Assert
+        assert response["Content-Disposition"] == (
+            'attachment; filename="Bootstrap%20Training%20Data.json"'
+        )
+
+    def test_report_export_not_modified_when_etag_matches(
+        self, logged_in_client, mapping
+    ):
+        # Arrange
+        etag = logged_in_client.get("/api/report-export/1/")["ETag"]
+
+        # Act
+        response = logged_in_client.get(
+            "/api/report-export/1/", HTTP_IF_NONE_MATCH=etag
+        )
+
+        # Assert
+        assert response.status_code == 304
+
+    def test_report_export_etag_changes_with_mappings(self, logged_in_client, mapping):
+        # Arrange
+        etag = logged_in_client.get("/api/report-export/1/")["ETag"]
+        new_mapping = Mapping.objects.create(
+            report=mapping.report,
+            sentence=mapping.sentence,
+            attack_object=mapping.attack_object,
+            confidence=100.0,
+        )
+
+        # Act
+        response = logged_in_client.get(
+            "/api/report-export/1/", HTTP_IF_NONE_MATCH=etag
+        )
+        new_mapping.delete()
+
+        # Assert
+        assert response.status_code == 200
+        assert response["ETag"] != etag
+
+    def test_report_export_etag_differs_by_format(self, logged_in_client, mapping):
+        # Act
+        json_etag = logged_in_client.get("/api/report-export/1/")["ETag"]
+        docx_etag = logged_in_client.get("/api/report-export/1/?type=docx")["ETag"]
+
+        # Assert
+        assert json_etag != docx_etag
+
     def test_export_docx_report(self, logged_in_client, mapping):
         """
         Check that something that looks like a Word doc was returned.
@@ -277,6 +502,17 @@ class TestReportExport:
         # Assert
         assert data[0].startswith(b"PK\x03\x04")
 
+    def test_export_docx_report_streams_fixed_size_chunks(
+        self, logged_in_client, mapping
+    ):
+        # Act
+        response = logged_in_client.get("/api/report-export/1/?type=docx")
+        data = list(response.streaming_content)
+
+        # Assert
+        assert all(len(chunk) == views.STREAMING_CHUNK_SIZE for chunk in data[:-1])
+        assert 0 < len(data[-1]) <= views.STREAMING_CHUNK_SIZE
+
     def test_bootstrap_training_data_can_be_posted_as_json_report(
         self, logged_in_client
     ):
@@ -306,7 +542,17 @@ class TestReportExport:
         response = logged_in_client.get(f"/api/download/{document.id}")
 
         # Assert
-        assert response.content == b"test file content"
+        assert b"".join(response.streaming_content) == b"test file content"
+        assert response["Content-Disposition"] == (
+            "attachment; filename=sample-document.txt"
+        )
+
+    def test_download_missing_document_returns_404(self, logged_in_client):
+        # Act
+        response = logged_in_client.get("/api/download/999999")
+
+        # Assert
+        assert response.status_code == 404
 
     def test_get_reports_by_doc_id(self, logged_in_client, report_with_document):
         # Act
@@ -327,6 +573,17 @@ class TestMl:
         # Assert
         assert response.status_code == 200  # HTTP 200 Ok
 
+    def test_ml_home_lists_technique_sentence_counts(self, logged_in_client, mapping):
+        # Act
+        response = logged_in_client.get("/ml/")
+
+        # Assert
+        technique = next(
+            t for t in response.context["techniques"] if t["attack_id"] == "T1059"
+        )
+        assert technique["total_sentences"] >= 1
+        assert b'href="/ml/techniques/T1059"' in response.content
+
     def test_ml_model_detail_returns_http_200_ok(self, logged_in_client):
         # Act
         response = logged_in_client.get("/ml/models/dummy")
@@ -340,3 +597,36 @@ class TestMl:
 
         # Assert
         assert response.status_code == 404  # HTTP 200 Ok
+
+    def test_attack_techniques_are_served_from_cache(self, django_assert_num_queries):
+        # Arrange
+        expected = views._get_attack_techniques()
+
+        # Act
+        with django_assert_num_queries(1):  # Only the cache version lookup
+            techniques = views._get_attack_techniques()
+
+        # Assert
+        assert techniques == expected
+
+    def test_sentence_counts_include_new_mapping(self, mapping):
+        # Arrange
+        before = {
+            t["attack_id"]: t["total_sentences"] for t in views._get_sentence_counts()
+        }
+        new_mapping = Mapping.objects.create(
+            report=mapping.report,
+            sentence=mapping.sentence,
+            attack_object=mapping.attack_object,
+            confidence=100.0,
+        )
+
+        # Act
+        after = {
+            t["attack_id"]: t["total_sentences"] for t in views._get_sentence_counts()
+        }
+        new_mapping.delete()
+
+        # Assert
+        attack_id = mapping.attack_object.attack_id
+        assert after[attack_id] == before[attack_id] + 1